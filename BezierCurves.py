@@ -1,3 +1,5 @@
+import numpy as np
+
 VECTOR_STRENGTH = 1.2 - 1 # The -1 is to make editing more intuitive. At a first value of 1, they're at 100%, 0.5 at 50% etc.
 
 def getBezierPoint(t: float, p0: list, p1: list, p2: list, p3: list) -> list:
@@ -42,3 +44,25 @@ def getBezierGradient(t: float, p0: tuple, p1: tuple, p2: tuple, p3: tuple) -> l
     ty = coefs[0] * ys[0] + coefs[1] * ys[1] + coefs[2] * ys[2]
 
     return [tx, ty]
+
+
+
+def getBezierCoefficients(p0: list, p1: list, p2: list, p3: list):
+    """Returns the polynomial coefficients [a0, a1, a2, a3] of a bezier curve as a 4x2 array, where B(t) = a0 + a1*t + a2*t^2 + a3*t^3.
+    p1 and p2 are given as vectors from p0 and p3 like in getBezierPoint."""
+
+    p0 = np.asarray(p0, dtype=float)
+    p3 = np.asarray(p3, dtype=float)
+    p1 = p0 + np.asarray(p1, dtype=float) * (1 + VECTOR_STRENGTH)
+    p2 = p3 + np.asarray(p2, dtype=float) * (1 + VECTOR_STRENGTH)
+
+    return np.stack([p0,
+                     3 * (p1 - p0),
+                     3 * (p0 - 2 * p1 + p2),
+                     -p0 + 3 * p1 - 3 * p2 + p3])
+
+
+def getBezierPoints(t, coefs):
+    """Returns the points on a bezier curve with the 4x2 polynomial coefficients at every location in the array 0<=t<=1."""
+    t = t[:, np.newaxis]
+    return ((coefs[3] * t + coefs[2]) * t + coefs[1]) * t + coefs[0]
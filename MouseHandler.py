@@ -64,10 +64,11 @@ class Mouse:
         
         return [x, y]
 
+    # Also works on arrays of coordinates. The first division is not in place so the arrays passed in are not modified
     def inchToPixel(self, x, y):
 
-        x /= 144
-        y /= 144
+        x = x / 144
+        y = y / 144
 
         x *= 766
         y *= 766
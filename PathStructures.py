@@ -1,5 +1,6 @@
 from enum import Enum
 import Utility, math, pygame
+import numpy as np
 import SplineCurves, Robot
 
 class Pose:
@@ -191,7 +192,8 @@ class Path:
                 else:
                     m.playingSimulation = not m.playingSimulation
             else:
-                self.robot.startSimulation(m, slider, self.points)
+                xs, ys, thetas = zip(*[(p.x, p.y, p.theta) for p in self.points])
+                self.robot.startSimulation(m, slider, np.array(xs), np.array(ys), np.array(thetas))
                 
 
         # Handle stop simulation
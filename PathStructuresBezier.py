@@ -1,7 +1,8 @@
 from enum import Enum
 from termios import VT1
 import Utility
-import math
+from math import atan2, pi
+import numpy as np
 import pygame
 import SplineCurves
 import BezierCurves
@@ -39,10 +40,10 @@ class Pose:
     def touching(self, m):
         return Utility.distance(self.x, self.y, m.zx, m.zy) <= (Pose.RADIUS - 1) / m.zoom
 
-    def draw(self, screen, m, forceOrange=False):
+    # (x, y) is the pose's pixel position and zoom is m.getPartialZoom(0.75), both computed once per frame by the caller
+    def draw(self, screen, m, x, y, zoom, forceOrange=False):
 
-        r = (Pose.RADIUS + 2 if self.hovered else Pose.RADIUS) * \
-            m.getPartialZoom(0.75)
+        r = (Pose.RADIUS + 2 if self.hovered else Pose.RADIUS) * zoom
 
         if forceOrange:
             color = Utility.ORANGE
@@ -52,9 +53,7 @@ class Pose:
 
         p1 = m.inchToPixel(self.x - self.forward_x, self.y - self.forward_y)
         p2 = m.inchToPixel(self.x + self.forward_x , self.y + self.forward_y)
-        Utility.drawVector(screen, *p1, *p2, m.getPartialZoom(0.75))
-
-        x, y = m.inchToPixel(self.x, self.y)
+        Utility.drawVector(screen, *p1, *p2, zoom)
 
         #  draw triangle
         if self.theta is not None:
@@ -65,40 +64,82 @@ class Pose:
 
         if self.showCoords or self.hovered:
             string = "({},{})".format(round(self.x, 1), round(self.y, 1))
-            Utility.drawText(screen, Utility.getFont(23 * m.getPartialZoom(0.75)),
-                             string, Utility.TEXTCOLOR, x, y - 25*m.getPartialZoom(0.75))
+            Utility.drawText(screen, Utility.getFont(23 * zoom),
+                             string, Utility.TEXTCOLOR, x, y - 25*zoom)
 
 
 
-# Each point is generated through interpolating between poses
+# Each point is generated through interpolating between poses. Path stores its points as arrays, this is only a view of one of them
 class Point:
-    def __init__(self, x: int, y: int, color):
+    def __init__(self, x: int, y: int, color, theta = None):
         self.x = x
         self.y = y
         self.color = color
+        self.theta = theta
+
+
+# The spline between two poses, with its arc length table and the points last generated on it, cached between interpolations
+class SplineSegment:
+    def __init__(self, key, coefs, arc):
+        self.key = key
+        self.coefs = coefs
+        self.arc = arc
+
+        # spillover the points were generated with, the points, and the spillover they left for the next segment
+        self.s = None
+        self.points = None
+        self.spillover = None
 
 
 class Path:
 
+    # Size in inches of the cells of the pose grid. Larger than the touching radius of a pose, so only neighbouring cells need checking
+    GRID_CELL = 2 * Pose.RADIUS
+
+    # Number of samples along each spline segment used to compute its arc length
+    ARC_SAMPLES = 200
+    ARC_T = np.linspace(0, 1, ARC_SAMPLES)
+
     def __init__(self, segmentDistance):
 
         self.poses = []
-        self.points = []
+
+        # Interpolated points, stored as one array per attribute
+        self.clearPoints()
 
         self.robot = Robot.PurePursuitRobot(50, 30)
         #self.robot = Robot.IdealRobot(50, 30)
 
         self.segmentDistance = segmentDistance
 
+        # SplineSegments of the last interpolation, keyed by the geometry of their two poses
+        self.segmentCache = {}
+
+        # Poses bucketed by grid cell for finding the poses near the mouse, rebuilt when set to None after poses change
+        self.poseGrid = None
+        self.hoveredPoses = []
+
         self.pathIndex = -1
 
+    def clearPoints(self):
+        self.px = np.empty(0)
+        self.py = np.empty(0)
+        self.ptheta = np.empty(0)
+
+        # For each segment between pose[i] and pose[i+1]: its SplineSegment (None if the poses overlap),
+        # the index of its first point and the spillover it started with
+        self.splineSegments = []
+        self.segmentStarts = []
+        self.segmentSpillovers = []
+
+    def getPoint(self, i):
+        return Point(self.px[i], self.py[i], Utility.RED, self.ptheta[i])
+
     def getPoseIndex(self, pose):
-        index = -1
-        for i in range(len(self.poses)):
-            if self.poses[i] == pose:
-                index = i
-                break
-        return index
+        try:
+            return self.poses.index(pose)
+        except ValueError:
+            return -1
 
     def deletePose(self, index):
         if type(index) is not int:
@@ -109,6 +150,7 @@ class Path:
         if index == 0 and len(self.poses) > 1 and self.poses[1].theta is None:
             self.poses[1].theta = self.poses[0].theta
         del self.poses[index]
+        self.poseGrid = None
 
     def getTouchingPathIndex(self, x, y):
 
@@ -146,45 +188,67 @@ class Path:
                 # Set control point to mouse
                 if Utility.distance(m.zx, m.zy, p.x, p.y) > 1: # control point must be at least one inch away from pose
                     p.setVectorOffset(m.zx, m.zy)
-                    self.interpolatePoints()
+                    self.interpolatePointsAround(self.getPoseIndex(p))
                 
             else: # Set robot heading to mouse
                 # for close distances, remove heading. But first MUST have heading
                 if p is not self.poses[0] and Utility.distance(m.x, m.y, px, py) < Pose.RADIUS*2:
                     p.theta = None
                 else:  # Otherwise, get heading from normalized vector from center to mouse
-                    p.theta = math.atan2(m.y - py, m.x - px)
+                    p.theta = atan2(m.y - py, m.x - px)
+
+                self.interpolatePointsAround(self.getPoseIndex(p))
 
-                self.interpolatePoints()
+    def getGridCell(self, x, y):
+        return (int(x // Path.GRID_CELL), int(y // Path.GRID_CELL))
+
+    # Poses in the grid cells around (x, y), in path order
+    def getPosesNear(self, x, y):
+
+        if self.poseGrid is None:
+            self.poseGrid = {}
+            for i, pose in enumerate(self.poses):
+                self.poseGrid.setdefault(self.getGridCell(pose.x, pose.y), []).append((i, pose))
+
+        cx, cy = self.getGridCell(x, y)
+        near = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                near += self.poseGrid.get((cx + dx, cy + dy), [])
+
+        return [pose for i, pose in sorted(near, key=lambda item: item[0])]
 
     def handleHoveringOverPoses(self, m):
 
         anyHovered = False
 
-        if m.x < Utility.SCREEN_SIZE and m.poseDragged is None and m.poseSelectHeading is None:
-            for pose in self.poses:
-                if pose.touching(m):
-                    anyHovered = True
-                    pose.hovered = True
-
-                    if m.pressedR and not m.simulating:
-                        pose.isBreak = not pose.isBreak
-                        self.interpolatePoints()
-
-                    if not m.simulating and m.getKey(pygame.K_x) and not m.getKey(pygame.K_c):
-                        self.deletePose(pose)
-                        self.interpolatePoints()
-                    elif m.pressed and m.poseDragged is None:
-                        if (m.getKey(pygame.K_c) or m.getKey(pygame.K_v)) and not m.simulating:
-                            m.poseSelectHeading = pose
-                            m.selectVectorNotHeading = m.getKey(pygame.K_v)
-                        else:
-                            m.poseDragged = pose
-                            m.startDragX = m.x
-                            m.startDragY = m.y
-                            
-                else:
-                    pose.hovered = False
+        if m.x < Utility.SCREEN_SIZE and m.poseDragged is None and m.poseSelectHeading is None and not m.simulating:
+
+            # Only poses near the mouse can be touching it. Unhover the ones hovered last time instead of checking every pose
+            touching = [pose for pose in self.getPosesNear(m.zx, m.zy) if pose.touching(m)]
+            for pose in self.hoveredPoses:
+                pose.hovered = False
+            self.hoveredPoses = touching
+
+            for pose in touching:
+                anyHovered = True
+                pose.hovered = True
+
+                if m.pressedR and not m.simulating:
+                    pose.isBreak = not pose.isBreak
+                    self.interpolatePoints()
+
+                if not m.simulating and m.getKey(pygame.K_x) and not m.getKey(pygame.K_c):
+                    self.deletePose(pose)
+                    self.interpolatePoints()
+                elif m.pressed and m.poseDragged is None:
+                    if (m.getKey(pygame.K_c) or m.getKey(pygame.K_v)) and not m.simulating:
+                        m.poseSelectHeading = pose
+                        m.selectVectorNotHeading = m.getKey(pygame.K_v)
+                    else:
+                        m.poseDragged = pose
+                        m.startDragX = m.x
+                        m.startDragY = m.y
 
         return anyHovered
 
@@ -192,12 +256,12 @@ class Path:
     def handleSimulation(self, m, slider):
 
         # Handle auto-calibration
-        if m.simulating and m.getKey(pygame.K_RETURN) and len(self.points) > 0:
+        if m.simulating and m.getKey(pygame.K_RETURN) and len(self.px) > 0:
             if isinstance(self.robot, Robot.PurePursuitRobot):
                 self.robot.autoCalibrate(m, slider)
 
         # Handle start simulation
-        if m.getKeyPressed(pygame.K_SPACE) and len(self.points) > 0:
+        if m.getKeyPressed(pygame.K_SPACE) and len(self.px) > 0:
 
             if m.simulating:  # Toggle playback
                 if slider.value == slider.high:
@@ -206,7 +270,7 @@ class Path:
                 else:
                     m.playingSimulation = not m.playingSimulation
             else:
-                self.robot.startSimulation(m, slider, self.points)
+                self.robot.startSimulation(m, slider, self.px, self.py, self.ptheta)
 
         # Handle stop simulation
         if m.getKey(pygame.K_ESCAPE):
@@ -214,6 +278,10 @@ class Path:
 
     def handlePlayback(self, m, slider):
 
+        # Playback waits for the simulation to finish computing
+        if not self.robot.pollSimulation(slider):
+            return
+
         if m.simulating and m.playingSimulation:
             if slider.value == slider.high:
                 m.playingSimulation = False
@@ -221,10 +289,8 @@ class Path:
                 slider.value += 1
                 slider.updateXFromIndex()
 
-    def handleMouse(self, m, slider):
-        self.handleSimulation(m, slider)
-
-        # Handle scrolling the field
+    # Handle scrolling the field
+    def handlePanning(self, m):
         if not m.pressing:
             m.panning = False
         if m.panning:
@@ -233,6 +299,18 @@ class Path:
             m.panX += dx
             m.panY += dy
             m.boundFieldPan()
+
+    def handleMouse(self, m, slider):
+        self.handleSimulation(m, slider)
+        self.handlePanning(m)
+
+        # Poses can't be edited during simulation, so skip hovering and editing them and only allow panning
+        if m.simulating:
+            self.pathIndex = -1
+            if m.pressed and m.x < Utility.SCREEN_SIZE:
+                m.panning = True
+            return False
+
         self.handleMouseHeading(m)
 
         # Update dragging and handle toggling showCoords
@@ -243,7 +321,8 @@ class Path:
                     m.poseDragged.x = min(m.pixelToInch(
                         Utility.SCREEN_SIZE, 0)[0], m.zx)
                     m.poseDragged.y = m.zy
-                    self.interpolatePoints()
+                    self.poseGrid = None
+                    self.interpolatePointsAround(self.getPoseIndex(m.poseDragged))
 
             if not m.pressing:
                 if m.released and m.startDragX == m.x and m.startDragY == m.y:
@@ -266,7 +345,8 @@ class Path:
                 # delete everything if only 2 poses and deleting the edge between them
                 if len(self.poses) == 2:
                     self.poses = []
-                    self.points = []
+                    self.poseGrid = None
+                    self.clearPoints()
                 else:
                     print(self.pathIndex, len(self.poses))
                     p1 = self.poses[self.pathIndex]
@@ -304,12 +384,14 @@ class Path:
         if self.pathIndex == -1:  # add to the end
 
             # only the first pose has a predefined position (pointing up)
-            self.poses.append(Pose(px, py, fx, fy, -math.pi/2 if len(self.poses) == 0 else None))
+            self.poses.append(Pose(px, py, fx, fy, -pi/2 if len(self.poses) == 0 else None))
 
         else:  # insert between two poses
 
             self.poses.insert(self.pathIndex + 1, Pose(px, py, fx, fy))
 
+        self.poseGrid = None
+
         self.interpolatePoints()
 
     def drawPaths(self, screen, m):
@@ -317,118 +399,180 @@ class Path:
         if len(self.poses) == 0:
             return
 
+        zoom = m.getPartialZoom(0.75)
+        pixels = [m.inchToPixel(pose.x, pose.y) for pose in self.poses]
+
         for i in range(1, len(self.poses)):
             color = Utility.LINEDARKGREY if (
                 self.pathIndex == i-1) else Utility.LINEGREY
-            Utility.drawLine(screen, color, *m.inchToPixel(self.poses[i-1].x, self.poses[i-1].y), *m.inchToPixel(
-                self.poses[i].x, self.poses[i].y), 3 * m.getPartialZoom(0.75))
+            Utility.drawLine(screen, color, *pixels[i-1], *pixels[i], 3 * zoom)
 
-        first = True
-        for pose in self.poses:
-            pose.draw(screen, m, first)
-            first = False
+        for i, pose in enumerate(self.poses):
+            pose.draw(screen, m, *pixels[i], zoom, i == 0)
 
 
-    # Interpolate pose[i] to pose[i+1] using Catmull-Rom spline curve with s spillover
-    def interpolateSplineCurve(self, i: int, s: int) -> int:
-        P1 = [self.poses[i].x, self.poses[i].y]
-        V1 = [self.poses[i].forward_x, self.poses[i].forward_y]
-        V2 = [self.poses[i+1].backward_x, self.poses[i+1].backward_y]
-        P2 = [self.poses[i+1].x, self.poses[i+1].y]
+    # Get the spline segment from pose[i] to pose[i+1], reusing its arc length table from cache if neither pose has changed
+    def getSplineSegment(self, i: int) -> SplineSegment:
+        pose1 = self.poses[i]
+        pose2 = self.poses[i+1]
+        key = (pose1.x, pose1.y, pose1.forward_x, pose1.forward_y, pose2.x, pose2.y, pose2.backward_x, pose2.backward_y)
 
-        if s == 0:
-            ns = 0
-        else:
-            dxds,dyds = BezierCurves.getBezierGradient(0, P1, [V1[0], V1[1]], [V2[0], V2[1]], P2)
-            dsdt = s / Utility.hypo(dxds, dyds)
-            ns = dsdt # s normalized from 0 to 1 for this specific spline
-            if ns > 1:
-                return ns - 1 # no points on this spline segment
+        segment = self.segmentCache.get(key)
+        if segment is None:
+            P1 = [pose1.x, pose1.y]
+            V1 = [pose1.forward_x, pose1.forward_y]
+            V2 = [pose2.backward_x, pose2.backward_y]
+            P2 = [pose2.x, pose2.y]
+
+            coefs = BezierCurves.getBezierCoefficients(P1, V1, V2, P2)
+            xy = BezierCurves.getBezierPoints(Path.ARC_T, coefs)
+
+            # Arc length lookup table: cumulative length of the polyline through the curve at each t
+            chords = np.diff(xy, axis=0)
+            arc = np.concatenate([[0], np.cumsum(np.hypot(chords[:, 0], chords[:, 1]))])
+
+            segment = SplineSegment(key, coefs, arc)
 
-        while ns < 1:
-            x, y = BezierCurves.getBezierPoint(ns, P1, [V1[0], V1[1]], [V2[0], V2[1]], P2)
-            self.points.append(Point(x, y, Utility.RED))
+        return segment
 
-            dxds, dyds = BezierCurves.getBezierGradient(ns, P1, [V1[0], V1[1]], [V2[0], V2[1]], P2)
-            dsdt = self.segmentDistance / Utility.hypo(dxds, dyds)
-            ns += dsdt
+    # Interpolate a segment along the bezier curve with s spillover. The whole segment is sampled at once
+    # and points are placed at every segmentDistance along its arc length. Returns the points as an Nx2 array and the new spillover
+    def interpolateSplineCurve(self, segment: SplineSegment, s: float) -> tuple:
 
-        s = self.segmentDistance - Utility.distance(x,y,*P2)
-        return s
+        # Same segment with the same spillover generates the same points
+        if segment.s == s:
+            return segment.points, segment.spillover
+
+        arc = segment.arc
+        targets = np.arange(s, arc[-1], self.segmentDistance)
+        if len(targets) == 0:
+            xy = np.empty((0, 2))
+            spillover = s - arc[-1] # no points on this spline segment
+        else:
+            # Invert the arc length table to find the t of each point
+            xy = BezierCurves.getBezierPoints(np.interp(targets, arc, Path.ARC_T), segment.coefs)
+            spillover = self.segmentDistance - (arc[-1] - targets[-1])
+
+        segment.s = s
+        segment.points = xy
+        segment.spillover = spillover
+        return xy, spillover
 
     # Interpolate between all the *given* thetas, as in some poses do not specify theta and should just be interpolated between the poses besides them
     def interpolateTheta(self, knownThetaIndexes):
 
-        i1, theta1 = knownThetaIndexes[0]
-        assert i1 == 0
-        for ki in range(1, len(knownThetaIndexes)):
-            i2, theta2 = knownThetaIndexes[ki]
-
-            for i in range(0, i2-i1+1):
-                # Eliminate mod "wraparounds" by always finding the closest direction to spin
-                theta2adjusted = theta2
-                if theta2 - theta1 >= math.pi:
-                    theta2adjusted -= 2*math.pi
-                elif theta1 - theta2 >= math.pi:
-                    theta2adjusted += 2*math.pi
-                    
-                self.points[ i1 + i].theta = theta1 + (theta2adjusted - theta1) * (i / (i2-i1))    
-
-            i1 = i2
-            theta1 = theta2
-
-        # For all the points past the last known theta index, just set theta to the same number
-        for index in range(i1, len(self.points)):
-            self.points[index].theta = theta1
-
-    # Call this function to update self.points whenever there is a change in interpolation. Generates a list of points from the entire combined path
+        indexes = np.array([k[0] for k in knownThetaIndexes])
+        assert indexes[0] == 0
+
+        # Eliminate mod "wraparounds" by always finding the closest direction to spin, wrapping each change in theta to [-pi, pi)
+        thetas = np.array([k[1] for k in knownThetaIndexes])
+        deltas = (np.diff(thetas) + pi) % (2*pi) - pi
+        thetas = thetas[0] + np.concatenate([[0], np.cumsum(deltas)])
+
+        # Points past the last known theta index just keep the same theta
+        self.ptheta = np.interp(np.arange(len(self.px)), indexes, thetas)
+
+    # Call this function to update the points whenever there is a change in interpolation. Generates the points from the entire combined path
     def interpolatePoints(self) -> None:
+        self.interpolateSegments(0)
+
+    # Call this instead of interpolatePoints when only pose[index] has changed, which only changes the segments on either side of it
+    def interpolatePointsAround(self, index: int) -> None:
+        if len(self.splineSegments) != len(self.poses) - 1:
+            self.interpolatePoints()
+        else:
+            self.interpolateSegments(max(index - 1, 0), index)
+
+    # Regenerate the points of every segment from pose[first] onwards, keeping the points of the segments before it.
+    # If only the segments up to pose[last] have changed, the segments after it are also kept from the first one that
+    # starts with the same spillover as before, as they would generate the same points
+    def interpolateSegments(self, first: int, last: int = None) -> None:
 
-        self.points = []
-        # for the purposes of interpolating theta after initially generating list of points
-        knownThetaIndexes = []
+        px, py = self.px, self.py
+        oldSegments, oldStarts, oldSpillovers = self.splineSegments, self.segmentStarts, self.segmentSpillovers
+        self.clearPoints()
 
         if len(self.poses) < 2:
             return
 
-        s = 0
-        for i in range(len(self.poses) - 1):
+        numPoints = oldStarts[first] if first > 0 else 0
+        s = oldSpillovers[first] if first > 0 else 0
+
+        self.splineSegments = oldSegments[:first]
+        self.segmentStarts = oldStarts[:first]
+        self.segmentSpillovers = oldSpillovers[:first]
+        points = [np.stack([px[:numPoints], py[:numPoints]], axis=1)]
+
+        for i in range(first, len(self.poses) - 1):
+
+            if last is not None and i > last and s == oldSpillovers[i]:
+                shift = numPoints - oldStarts[i]
+                self.splineSegments += oldSegments[i:]
+                self.segmentStarts += [start + shift for start in oldStarts[i:]]
+                self.segmentSpillovers += oldSpillovers[i:]
+                points.append(np.stack([px[oldStarts[i]:], py[oldStarts[i]:]], axis=1))
+                numPoints += len(px) - oldStarts[i]
+                break
+
+            self.segmentStarts.append(numPoints)
+            self.segmentSpillovers.append(s)
 
             if self.poses[i].x == self.poses[i+1].x and self.poses[i].y == self.poses[i+1].y:
+                self.splineSegments.append(None)
                 continue
 
-            # Mark point with theta if pose has specified theta
-            if self.poses[i].theta is not None:
-                knownThetaIndexes.append(
-                    [len(self.points), self.poses[i].theta])
+            segment = self.getSplineSegment(i)
+            self.splineSegments.append(segment)
 
-            s = self.interpolateSplineCurve(i, s)
+            xy, s = self.interpolateSplineCurve(segment, s)
+            points.append(xy)
+            numPoints += len(xy)
 
             # no spillovers at break points
             if self.poses[i+1].isBreak:
                 s = 0
 
-        # Mark last point with theta if it exists
+        # Segments no longer in the path are dropped from the cache
+        self.segmentCache = {segment.key: segment for segment in self.splineSegments if segment is not None}
+
+        if numPoints == 0:
+            return
+
+        xy = np.concatenate(points)
+        self.px = xy[:, 0]
+        self.py = xy[:, 1]
+
+        # for the purposes of interpolating theta after generating the points. Mark the first point of each segment
+        # with theta if its pose has specified theta, and the last point if the last pose has specified theta
+        knownThetaIndexes = [[self.segmentStarts[i], self.poses[i].theta] for i in range(len(self.splineSegments))
+                             if self.splineSegments[i] is not None and self.poses[i].theta is not None]
+
         if self.poses[-1].theta is not None:
             knownThetaIndexes.append(
-                [len(self.points)-1, self.poses[-1].theta])
+                [numPoints-1, self.poses[-1].theta])
 
-        if len(self.poses) > 1:
-            self.interpolateTheta(knownThetaIndexes)
+        self.interpolateTheta(knownThetaIndexes)
 
     def drawPoints(self, screen, m):
 
         POINT_SIZE = 1
         TANGENT_LENGTH = 10
 
-        for p in self.points:
-            p.px, p.py = m.inchToPixel(p.x, p.y)
-            Utility.drawLine(screen, Utility.PURPLE, p.px, p.py, *Utility.vector(
-                p.px, p.py, p.theta, TANGENT_LENGTH * m.getPartialZoom(0.5)),  m.getPartialZoom(0.75))
+        xs, ys = m.inchToPixel(self.px, self.py)
+        length = TANGENT_LENGTH * m.getPartialZoom(0.5)
+        tangentXs = xs + length * np.cos(self.ptheta)
+        tangentYs = ys + length * np.sin(self.ptheta)
+
+        # Batch the drawing calls with plain lists of pixel coordinates
+        xs, ys = xs.astype(int).tolist(), ys.astype(int).tolist()
+        tangentXs, tangentYs = tangentXs.tolist(), tangentYs.tolist()
+
+        # One pixel wider to match the anti-aliased edges Utility.drawLine adds
+        width = round(m.getPartialZoom(0.75)) + 1
+        for x, y, tx, ty in zip(xs, ys, tangentXs, tangentYs):
+            pygame.draw.line(screen, Utility.PURPLE, (x, y), (tx, ty), width)
 
-        for p in self.points:
-            Utility.drawCircle(screen, p.px, p.py, p.color,
-                               POINT_SIZE * m.getPartialZoom(0.75))
+        Utility.drawCircles(screen, xs, ys, Utility.RED, POINT_SIZE * m.getPartialZoom(0.75))
 
     def drawRobot(self, screen, m, pointIndex):
 
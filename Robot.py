@@ -1,4 +1,7 @@
-import math, Utility, random, Slider
+import Utility, random, Slider
+import concurrent.futures
+import numpy as np
+from math import hypot, pi
 
 STEP_TIME = 0.02 # 20 millisecond cycle time
 STOP_DISTANCE_THRESHOLD = 1 # In inches, pathfinding algo terminates when distance to destination dips below threshold
@@ -14,30 +17,136 @@ MAX_ROT_ACCEL *= 0.02
 
 # A point at some timestep in the simulation, generated numerically from some pathfinding algorithm, which can differ slightly from the theoretical trajectory
 class SimulationPoint:
-    def __init__(self, x, y, theta, **kwargs):
+
+    # Simulations hold thousands of points, so store attributes in slots rather than a dict per point.
+    # Besides the robot pose, the velocities, closest point, lookahead point, lookahead curvature and error are only set by some robots
+    __slots__ = ("x", "y", "theta", "xvel", "yvel", "tvel", "cx", "cy", "lx", "ly", "curve", "error")
+
+    def __init__(self, x, y, theta, xvel = None, yvel = None, tvel = None, cx = None, cy = None, lx = None, ly = None, curve = None, error = None):
         self.x = x
         self.y = y
         self.theta = theta
 
-        self.__dict__.update(kwargs) # handy way to store any keyword arguments as instance variables
-
-class PID:
-    def __init__(self, KP, KI, KD):
-        self.KP = KP
-        self.KI = KI
-        self.KD = KD
-
-        self.prevError = 0
-        self.prevIntegral = 0
-        
-    def tick(self, error):
-
-        integral = self.prevIntegral + error * STEP_TIME
-        derivative = (error - self.prevError) / STEP_TIME
-        self.prevError = error
-        self.prevIntegral = integral
-
-        return self.KP * error + self.KI * integral + self.KD * derivative
+        self.xvel = xvel
+        self.yvel = yvel
+        self.tvel = tvel
+        self.cx = cx
+        self.cy = cy
+        self.lx = lx
+        self.ly = ly
+        self.curve = curve
+        self.error = error
+
+# Pure pursuit control loop of PurePursuitRobot, written with only numbers and arrays so that it can be compiled by numba.
+# Returns the number of timesteps simulated, and for each timestep the robot position, heading, velocities, closest and lookahead indexes and error
+def simulatePurePursuit(px, py, ptheta, parc, x, y, theta, lookahead, kp, kd, noise, maxTimesteps):
+
+    xs = np.empty(maxTimesteps + 1)
+    ys = np.empty(maxTimesteps + 1)
+    thetas = np.empty(maxTimesteps + 1)
+    xvels = np.empty(maxTimesteps + 1)
+    yvels = np.empty(maxTimesteps + 1)
+    tvels = np.empty(maxTimesteps + 1)
+    cis = np.empty(maxTimesteps + 1, np.int64)
+    lis = np.empty(maxTimesteps + 1, np.int64)
+    errors = np.empty(maxTimesteps + 1)
+
+    n = len(px)
+    xvel = 0.0 # velocities in inches/second
+    yvel = 0.0
+    tvel = 0.0 # angular velocity
+    li = 0 # lookahead index
+    ci = 0 # closest index
+    prevXError = 0.0 # previous errors for the translation derivative terms
+    prevYError = 0.0
+
+    # Distances are only compared, so compare their squares and skip the sqrt
+    stopDistance2 = STOP_DISTANCE_THRESHOLD * STOP_DISTANCE_THRESHOLD
+
+    timestep = 0
+    while li != n - 1 or (px[-1] - x)**2 + (py[-1] - y)**2 > stopDistance2:
+
+        if timestep > maxTimesteps:
+            break
+
+        # Find closest waypoint within 30 points of the current waypoint
+        start = ci
+        end = max(min(ci + 30, n - 1), start + 1)
+        dx = px[start:end] - x
+        dy = py[start:end] - y
+        ci = start + np.argmin(dx*dx + dy*dy)
+
+        # Update lookahead distance, measured along the path. The closest index never decreases, so neither does the lookahead index
+        li = max(li, ci)
+        while li < n - 1 and parc[li] - parc[ci] < lookahead:
+            li += 1
+
+        # Calculate target velocities with PD control
+        xError = px[li] - x
+        yError = py[li] - y
+        targetXVel = kp * xError + kd * (xError - prevXError) / STEP_TIME
+        targetYVel = kp * yError + kd * (yError - prevYError) / STEP_TIME
+        prevXError = xError
+        prevYError = yError
+
+        # Constrain maximum robot speed
+        mag = hypot(targetXVel, targetYVel)
+        if mag > MAX_SPEED:
+            targetXVel *= MAX_SPEED / mag
+            targetYVel *= MAX_SPEED / mag
+
+        # Calculate heading delta (turn the fastest way) with P control
+        dtheta = (ptheta[li] - theta + pi) % (2*pi) - pi
+        targetTVel = 2 * dtheta
+
+        # I'd constrain individual wheel accelerations here but I don't know mecanum kinematics yet
+
+        # Update velocities given target velocities, and constrain with acceleration limits
+        xvel += min(max(targetXVel - xvel, -MAX_TRANS_ACCEL), MAX_TRANS_ACCEL)
+        yvel += min(max(targetYVel - yvel, -MAX_TRANS_ACCEL), MAX_TRANS_ACCEL)
+        tvel += min(max(targetTVel - tvel, -MAX_ROT_ACCEL), MAX_ROT_ACCEL)
+
+        # Update distance from actual velocity
+        x += xvel * STEP_TIME + noise[timestep, 0] # add positional noise to simulation for realism
+        y += yvel * STEP_TIME + noise[timestep, 1]
+        theta += tvel * STEP_TIME
+
+        # Distance from the robot to the path line through the closest point
+        if ci == 0:
+            ox, oy = px[ci+1], py[ci+1]
+        else:
+            ox, oy = px[ci-1], py[ci-1]
+        error = abs((ox - px[ci])*(py[ci] - y) - (px[ci] - x)*(oy - py[ci])) / hypot(px[ci] - ox, py[ci] - oy)
+
+        # Add timestep to simulation
+        xs[timestep] = x
+        ys[timestep] = y
+        thetas[timestep] = theta
+        xvels[timestep] = xvel
+        yvels[timestep] = yvel
+        tvels[timestep] = tvel
+        cis[timestep] = ci
+        lis[timestep] = li
+        errors[timestep] = error
+        timestep += 1
+
+    return timestep, xs, ys, thetas, xvels, yvels, tvels, cis, lis, errors
+
+simulationKernel = None
+
+# numba is imported on the first simulation rather than at startup, as it is slow to import and compile.
+# Without numba the kernel still runs as plain Python
+def getSimulationKernel():
+    global simulationKernel
+
+    if simulationKernel is None:
+        try:
+            import numba
+            simulationKernel = numba.njit(cache=True, fastmath=True, nogil=True)(simulatePurePursuit)
+        except ImportError:
+            simulationKernel = simulatePurePursuit
+
+    return simulationKernel
 
 # Abstract
 class GenericRobot:
@@ -47,10 +156,20 @@ class GenericRobot:
         self.length = length
         self.simulation = None
         self.error = -1
-        self.prevPoints = None
 
-    # should return simulation list and error
-    def computeSimulation(self, points):
+        # Path points the simulation follows, stored as one array per attribute
+        self.px = None
+        self.py = None
+        self.ptheta = None
+        self.pcurve = None
+        self.parc = None
+
+        # Simulations are computed on a worker thread so the UI doesn't freeze, simulation is None until it finishes
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.simulationFuture = None
+
+    # should return simulation list and error for the path given by the point arrays
+    def computeSimulation(self, px, py, ptheta, pcurve, parc):
         raise NotImplementedError("Must implement this function")
 
     # By default, no calibration happens
@@ -58,10 +177,12 @@ class GenericRobot:
         return
 
     def restartSimulation(self, m, slider):
-        self.startSimulation(m, slider, self.prevPoints)
+        self.startSimulation(m, slider, self.px, self.py, self.ptheta)
 
-    def startSimulation(self, m, slider, points):
-        self.prevPoints = points
+    def startSimulation(self, m, slider, xs, ys, thetas):
+        self.px = xs
+        self.py = ys
+        self.ptheta = thetas
         slider.reset()
 
         m.simulating = True
@@ -69,53 +190,81 @@ class GenericRobot:
         m.poseDragged = None
         m.poseSelectHeading = None
 
-        # Calculate curvature of each point
-        points[0].curve = 0
-        points[-1].curve = 0
-        for i in range(1, len(points) - 1):
-            angle = math.atan2(points[i+1].y - points[i-1].y, points[i+1].x - points[i-1].x) - math.atan2(points[i].y - points[i-1].y, points[i].x - points[i-1].x)
-            if angle > math.pi:
-                angle -= 2*math.pi
-            points[i].curve = abs(angle)
+        # Calculate curvature of each point, as the change in direction from the previous point, ends have none
+        angle = np.arctan2(ys[2:] - ys[:-2], xs[2:] - xs[:-2]) - np.arctan2(ys[1:-1] - ys[:-2], xs[1:-1] - xs[:-2])
+        angle = np.where(angle > pi, angle - 2*pi, angle)
+        curves = np.zeros(len(xs))
+        curves[1:-1] = np.abs(angle)
 
-        self.simulation, self.error = self.computeSimulation(points)
-        slider.high =  len(self.simulation) - 1
+        # Distance along the path to each point
+        arcs = np.concatenate([[0], np.cumsum(np.hypot(np.diff(xs), np.diff(ys)))])
+
+        self.pcurve = curves
+        self.parc = arcs
+
+        # Any earlier simulation still waiting to run is outdated, and one already running is ignored once it finishes
+        if self.simulationFuture is not None:
+            self.simulationFuture.cancel()
+        self.simulation = None
+        # The worker gets its own references to the path arrays, as a later simulation replaces the ones on self
+        self.simulationFuture = self.executor.submit(self.computeSimulation, xs, ys, thetas, curves, arcs)
+
+    # Take the simulation from the worker thread once it has finished. Returns whether the simulation is ready
+    def pollSimulation(self, slider):
+
+        if self.simulationFuture is not None and self.simulationFuture.done():
+            self.simulation, self.error = self.simulationFuture.result()
+            self.simulationFuture = None
+            self.computeOutlines()
+            slider.reset()
+            slider.high =  len(self.simulation) - 1
+
+        return self.simulation is not None
+
+    # Precompute the heading and the robot rectangle's corners, relative to its center and before zoom, at every simulation point
+    def computeOutlines(self):
+        thetas = np.array([p.theta for p in self.simulation])
+        cos = np.cos(thetas)
+        sin = np.sin(thetas)
+
+        # cos and sin of theta + pi/2 are -sin and cos of theta
+        dxw = -sin * self.width
+        dyw = cos * self.width
+        dxl = cos * self.length
+        dyl = sin * self.length
+
+        self.cosTheta = cos.tolist()
+        self.sinTheta = sin.tolist()
+        self.cornersX = np.stack([-dxw - dxl, dxw - dxl, dxw + dxl, -dxw + dxl], axis=1).tolist()
+        self.cornersY = np.stack([-dyw - dyl, dyw - dyl, dyw + dyl, -dyw + dyl], axis=1).tolist()
 
     # return if animation is still going
     def simulationTick(self, screen, m, pointIndex):
 
         self.pointIndex = pointIndex
 
+        # Keep simulating while the simulation is being computed
+        if self.simulation is None:
+            return True
+
         if pointIndex == len(self.simulation):
             return False
         
         p = self.simulation[pointIndex]
         cx, cy = m.inchToPixel(p.x, p.y)
-        theta = p.theta
-        width = self.width * m.zoom
         length = self.length * m.zoom
 
-        dxw = math.cos(theta + math.pi/2) * width
-        dyw = math.sin(theta + math.pi/2) * width
-        dxl = math.cos(theta) * length
-        dyl = math.sin(theta) * length
-
-        # Generate four points of a rectangle around (cx, cy) given some heading
-        points = [
-            (cx - dxw - dxl, cy - dyw - dyl),
-            (cx + dxw - dxl, cy + dyw - dyl),
-            (cx + dxw + dxl, cy + dyw + dyl),
-            (cx - dxw + dxl, cy - dyw + dyl),
-        ]
+        # Four points of a rectangle around (cx, cy) given some heading
+        points = [(cx + dx * m.zoom, cy + dy * m.zoom) for dx, dy in zip(self.cornersX[pointIndex], self.cornersY[pointIndex])]
 
         s = m.getPartialZoom(0.5)
         Utility.drawPolygon(screen, Utility.BLACK, points, 3 * s)
 
         # Draw arrow
-        tx = cx + math.cos(theta)*length * 0.4
-        ty = cy + math.sin(theta)*length * 0.4
+        tx = cx + self.cosTheta[pointIndex]*length * 0.4
+        ty = cy + self.sinTheta[pointIndex]*length * 0.4
         Utility.drawLine(screen, Utility.BLACK, cx, cy, tx, ty, 4  * s)
-        Utility.drawPolarTriangle(screen, Utility.BLACK, tx, ty, theta, 7 * s, 1, math.pi / 2)
+        Utility.drawPolarTriangle(screen, Utility.BLACK, tx, ty, p.theta, 7 * s, 1, pi / 2)
 
         return True
 
@@ -124,6 +273,10 @@ class GenericRobot:
 
     def drawPanel(self, screen):
 
+        if self.simulation is None:
+            Utility.drawText(screen, Utility.getFont(30), "Simulating...", Utility.BLACK, 865, 70, 0)
+            return
+
         # Draw timestamp
         Utility.drawText(screen, Utility.getFont(30), "Avg. error: {}\"".format(round(self.error, 2)), Utility.BLACK, 865, 70, 0)
         Utility.drawText(screen, Utility.getFont(30), "Time: {:.2f}s / {:.2f}s".format(self.pointIndex * STEP_TIME, self.totalTime()), Utility.BLACK, 865, 100, 0)
@@ -135,8 +288,8 @@ class IdealRobot(GenericRobot):
         super().__init__(width, height)
 
     # With an ideal robot, the robot's actual position in each timestep is what it is supposed to be
-    def computeSimulation(self, points):
-        return ([SimulationPoint(p.x, p.y, p.theta) for p in points], 0)
+    def computeSimulation(self, px, py, ptheta, pcurve, parc):
+        return ([SimulationPoint(x, y, theta) for x, y, theta in zip(px, py, ptheta)], 0)
 
 class PurePursuitRobot(GenericRobot):
 
@@ -157,7 +310,7 @@ class PurePursuitRobot(GenericRobot):
     # the lower the better
     def staticEvaluation(self, offsets):
 
-        simulation, error = self.computeSimulation(self.prevPoints, lookaheadOffset = offsets[0], kpOffset = offsets[1], kdOffset = offsets[2]) # in inches
+        simulation, error = self.computeSimulation(self.px, self.py, self.ptheta, self.pcurve, self.parc, lookaheadOffset = offsets[0], kpOffset = offsets[1], kdOffset = offsets[2]) # in inches
         time = (len(simulation)-1) * STEP_TIME # in seconds
         
         errorImportance = 1
@@ -201,113 +354,50 @@ class PurePursuitRobot(GenericRobot):
 
         self.restartSimulation(m, slider)
                 
-    # Find closest point to (x,y) in points, from index range [start, end)
-    # Returns index of closest point in points lis
-    def findClosestPoint(self, points, x, y, start, end):
-
-        start = max(start, 0)
-        end = min(end, len(points) - 1)
-
-        minIndex = start
-        minDist = Utility.distance(x, y, points[start].x, points[start].y)
-        start += 1
-        while start < end:
-            dist = Utility.distance(x, y, points[start].x, points[start].y)
-            if dist < minDist:
-                minIndex = start
-                minDist = dist
-            start += 1
-
-        return minIndex
-
     # starting x, y, theta
-    def computeSimulation(self, points, lookaheadOffset = 0, kpOffset = 0, kdOffset = 0):
+    def computeSimulation(self, px, py, ptheta, pcurve, parc, lookaheadOffset = 0, kpOffset = 0, kdOffset = 0):
 
         MAX_TIMESTEPS = 10000
-        timestep = 0
 
-        simulation = []
+        # The kernel needs a neighbouring point to measure error against, and doesn't bounds check once compiled
+        if len(px) < 2:
+            return [[], 0]
 
         # Start pose, which has inbuilt noise
-        x = points[0].x + 10 * random.triangular(-POSITION_NOISE, POSITION_NOISE)
-        y = points[0].y + 10 * random.triangular(-POSITION_NOISE, POSITION_NOISE)
-        theta = points[0].theta
+        x = px[0] + 10 * random.triangular(-POSITION_NOISE, POSITION_NOISE)
+        y = py[0] + 10 * random.triangular(-POSITION_NOISE, POSITION_NOISE)
+        theta = ptheta[0]
 
-        pidX = PID(self.kpSlider.value + kpOffset, 0, self.kdSlider.value + kdOffset)
-        pidY = PID(self.kpSlider.value + kpOffset, 0, self.kdSlider.value + kdOffset)
-        pidRot = PID(2, 0, 0)
-        
-        xvel = 0 # velocities in inches/second
-        yvel = 0
-        tvel = 0 # angular velocity
-        li = 0 # lookahead index
-        ci = 0 # closest index
+        kp = self.kpSlider.value + kpOffset
+        kd = self.kdSlider.value + kdOffset
+        lookahead = self.lookaheadSlider.value + lookaheadOffset
 
-        errorSum = 0
+        # Positional noise for every timestep, sampled all at once
+        noise = np.random.triangular(-POSITION_NOISE, 0, POSITION_NOISE, (MAX_TIMESTEPS + 1, 2))
 
-        while li != len(points) - 1 or Utility.distance(points[-1].x, points[-1].y, x, y) > STOP_DISTANCE_THRESHOLD:
+        n, xs, ys, thetas, xvels, yvels, tvels, cis, lis, errors = getSimulationKernel()(
+            px, py, ptheta, parc, x, y, theta, lookahead, kp, kd, noise, MAX_TIMESTEPS)
 
-            if timestep > MAX_TIMESTEPS:
-                break
+        cis = cis[:n]
+        lis = lis[:n]
+        errors = errors[:n]
+        columns = [xs[:n], ys[:n], thetas[:n], xvels[:n], yvels[:n], tvels[:n],
+                   px[cis], py[cis], px[lis], py[lis], pcurve[lis], errors]
 
-            # Find closest waypoint within 5 points of the current waypoint
-            ci = self.findClosestPoint(points, x, y, ci, ci + 30)
-        
-            # Update lookahead distance
-            li = ci
-            while li < len(points) - 1 and Utility.distance(points[li].x, points[li].y, points[ci].x, points[ci].y) < self.lookaheadSlider.value + lookaheadOffset:
-                li += 1
-
-             # Calculate target velocities
-            targetXVel = pidX.tick(points[li].x - x)
-            targetYVel = pidY.tick(points[li].y - y)
-
-            # Constrain maximum robot speed
-            mag = Utility.hypo(targetXVel, targetYVel)
-            scalar = min(1, MAX_SPEED / mag)
-            targetXVel *= scalar
-            targetYVel *= scalar
-            
-            # Calculate heading delta (turn the fastest way)
-            dtheta = (points[li].theta - theta) % (2*math.pi)
-            if dtheta > math.pi:
-                dtheta -= 2*math.pi
-            targetTVel = pidRot.tick(dtheta)
-
-            # I'd constrain individual wheel accelerations here but I don't know mecanum kinematics yet
-
-            # Update velocities given target velocities, and constrain with acceleration limits
-            xvel += Utility.clamp(targetXVel - xvel, -MAX_TRANS_ACCEL, MAX_TRANS_ACCEL)
-            yvel += Utility.clamp(targetYVel - yvel, -MAX_TRANS_ACCEL, MAX_TRANS_ACCEL)
-            tvel += Utility.clamp(targetTVel - tvel, -MAX_ROT_ACCEL, MAX_ROT_ACCEL)
-
-            # Update distance from actual velocity
-            x += xvel * STEP_TIME + random.triangular(-POSITION_NOISE, POSITION_NOISE) # add positional noise to simulation for realism 
-            y += yvel * STEP_TIME + random.triangular(-POSITION_NOISE, POSITION_NOISE)
-            theta += tvel * STEP_TIME
-
-            # Add timestep to simulation
-            if ci == 0:
-                ox, oy = points[ci+1].x, points[ci+1].y
-            else:
-               ox, oy = points[ci-1].x, points[ci-1].y
-
-            error = Utility.distanceTwoPoints(x, y, points[ci].x, points[ci].y, ox, oy)
-            errorSum += error
-            sp = SimulationPoint(x, y, theta, xvel = xvel, yvel = yvel, tvel = tvel,
-                                 cx = points[ci].x, cy = points[ci].y, lx = points[li].x, ly = points[li].y, curve = points[li].curve,
-                                 error = error)
-            simulation.append(sp)
-            timestep += 1
-
-        return [simulation, 0 if len(simulation) == 0 else (errorSum / len(simulation))]
+        simulation = [SimulationPoint(x, y, theta, xvel = xvel, yvel = yvel, tvel = tvel,
+                                      cx = cx, cy = cy, lx = lx, ly = ly, curve = curve, error = error)
+                      for x, y, theta, xvel, yvel, tvel, cx, cy, lx, ly, curve, error in zip(*[c.tolist() for c in columns])]
+
+        return [simulation, 0 if n == 0 else float(errors.mean())]
 
-    
     # Override generic simulationTick by drawing stats and lookahead line
     def simulationTick(self, screen, m, pointIndex):
 
         ret = super().simulationTick(screen, m, pointIndex)
 
+        if self.simulation is None or not ret:
+            return ret
+
         p = self.simulation[pointIndex]
 
         # Draw lookahead line
@@ -323,18 +413,20 @@ class PurePursuitRobot(GenericRobot):
 
         super().drawPanel(screen)
 
-         # Draw position and velocity stats
-        p = self.simulation[self.pointIndex]
         Utility.drawText(screen, Utility.getFont(40), "Pure Pursuit", Utility.BLACK, 865, 30, 0)
-        Utility.drawText(screen, Utility.getFont(20), "xpos: {} inch".format(round(p.x, 2)), Utility.BLACK, 825, 150, 0)
-        Utility.drawText(screen, Utility.getFont(20), "ypos: {} inch".format(round(p.y, 2)), Utility.BLACK, 825, 165, 0)
-        Utility.drawText(screen, Utility.getFont(20), "theta: {} deg".format(round(p.theta * 180 / math.pi, 2)), Utility.BLACK, 825, 180, 0)
-        Utility.drawText(screen, Utility.getFont(20), "xvel: {} inch/sec".format(round(p.xvel, 2)), Utility.BLACK, 955, 150, 0)
-        Utility.drawText(screen, Utility.getFont(20), "yvel: {} inch/sec".format(round(p.yvel, 2)), Utility.BLACK, 955, 165, 0)
-        Utility.drawText(screen, Utility.getFont(20), "tvel: {} deg/sec".format(round(p.tvel * 180 / math.pi, 2)), Utility.BLACK, 955, 180, 0)
-
-        Utility.drawText(screen, Utility.getFont(20), "Curve: {}".format(round(p.curve, 3)), Utility.BLACK, 825, 195, 0)
-        Utility.drawText(screen, Utility.getFont(20), "Error: {}\"".format(round(p.error, 3)), Utility.BLACK, 955, 195, 0)
+
+         # Draw position and velocity stats
+        if self.simulation is not None:
+            p = self.simulation[self.pointIndex]
+            Utility.drawText(screen, Utility.getFont(20), "xpos: {} inch".format(round(p.x, 2)), Utility.BLACK, 825, 150, 0)
+            Utility.drawText(screen, Utility.getFont(20), "ypos: {} inch".format(round(p.y, 2)), Utility.BLACK, 825, 165, 0)
+            Utility.drawText(screen, Utility.getFont(20), "theta: {} deg".format(round(p.theta * 180 / pi, 2)), Utility.BLACK, 825, 180, 0)
+            Utility.drawText(screen, Utility.getFont(20), "xvel: {} inch/sec".format(round(p.xvel, 2)), Utility.BLACK, 955, 150, 0)
+            Utility.drawText(screen, Utility.getFont(20), "yvel: {} inch/sec".format(round(p.yvel, 2)), Utility.BLACK, 955, 165, 0)
+            Utility.drawText(screen, Utility.getFont(20), "tvel: {} deg/sec".format(round(p.tvel * 180 / pi, 2)), Utility.BLACK, 955, 180, 0)
+
+            Utility.drawText(screen, Utility.getFont(20), "Curve: {}".format(round(p.curve, 3)), Utility.BLACK, 825, 195, 0)
+            Utility.drawText(screen, Utility.getFont(20), "Error: {}\"".format(round(p.error, 3)), Utility.BLACK, 955, 195, 0)
 
         self.lookaheadSlider.draw(screen, True)
         self.kpSlider.draw(screen, True)
@@ -1,4 +1,5 @@
-import pygame, math, pygame.gfxdraw
+import pygame, math, pygame.gfxdraw, functools
+from math import cos, sin, hypot
 
 pygame.font.init()
 
@@ -28,10 +29,10 @@ def clamp(value, mn, mx):
     return max(mn, min(mx, value))
 
 def hypo(s1, s2):
-    return math.sqrt(s1*s1 + s2 * s2)
+    return hypot(s1, s2)
 
 def distance(x1,y1,x2,y2):
-    return math.sqrt( ((x1-x2)**2)+((y1-y2)**2) )
+    return hypot(x1-x2, y1-y2)
 
 # Distance between point (x0, y0) and line (x1, y1,),(x2,y2)
 def distanceTwoPoints(x0, y0, x1, y1, x2, y2):
@@ -73,8 +74,13 @@ def getFont(size):
     else:
         return FONT40
 
+# Fonts are only created once above, but rendering text is slow and the same strings are drawn every frame
+@functools.lru_cache(maxsize=256)
+def renderText(font, string, color):
+    return font.render(string, True, color)
+
 def drawText(surface, font, string, color, x, y, s = 0.5):
-    text = font.render(string, True, color)
+    text = renderText(font, string, color)
     surface.blit(text, [x - text.get_width()*s, y])
 
 def drawThinLine(screen, color, x1, y1, x2, y2):
@@ -93,6 +99,20 @@ def drawCircle(screen, x, y, color, radius, alpha = 255):
         pygame.draw.circle(surface, (*color, alpha), (radius, radius), radius)
         screen.blit(surface, (x - radius, y - radius))
 
+# A circle drawn like drawCircle on its own surface, for blitting many identical circles at once
+@functools.lru_cache(maxsize=16)
+def getCircleSprite(color, radius):
+    radius = int(radius)
+    surface = pygame.Surface([radius*2 + 1, radius*2 + 1], pygame.SRCALPHA)
+    pygame.gfxdraw.aacircle(surface, radius, radius, radius, color)
+    pygame.draw.circle(surface, color, (radius, radius), radius)
+    return surface
+
+def drawCircles(screen, xs, ys, color, radius):
+    sprite = getCircleSprite(color, int(radius))
+    offset = int(radius)
+    screen.blits([(sprite, (x - offset, y - offset)) for x, y in zip(xs, ys)], False)
+
 def drawTriangle(screen, color,  x1, y1, x2, y2, x3, y3):
     x1 = int(x1)
     x2 = int(x2)
@@ -125,8 +145,6 @@ def drawLine(screen, color, x1, y1, x2, y2, thickness = 1):
 
     thickness = round(thickness)
 
-    from math import cos, sin
-
     X0 = [x1,y1]
     X1 = [x2,y2]
 